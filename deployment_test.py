@@ -2,6 +2,8 @@ from fastapi import FastAPI, Form, HTTPException
 from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 import pickle
+import os
+import sys
 
 app = FastAPI()
 
@@ -22,6 +24,20 @@ label_mapping = {
     2: "comment"
 }
 
+# Optional cascade: uncertain texts are escalated to the LLM if an OpenAI key is set
+cascade = None
+if os.environ.get("OPENAI_API_KEY"):
+    sys.path.append("./src/modules")
+    from cascade import CascadeClassifier
+    from openAI import OpenAI
+
+    # One client for all requests, so LLM calls share its concurrency and rate limits,
+    # and escalated texts of concurrent requests are micro-batched by predict_async
+    cascade = CascadeClassifier(clf, vectorizer,
+                                OpenAI(os.environ["OPENAI_API_KEY"], cache_path="./depl_model/llm_cache.sqlite"),
+                                threshold=float(os.environ.get("CASCADE_THRESHOLD", 0.2)),
+                                llm_label_map=CascadeClassifier.make_label_map({v: k for k, v in label_mapping.items()}))
+
 # Serve static files from the 'docs' directory
 app.mount("/static", StaticFiles(directory="docs"), name="static")
 
@@ -40,3 +56,14 @@ async def predict(text: str = Form(...)):
         return JSONResponse(content={"label": label})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction failed: {e}")
+
+@app.post("/predict_cascade")
+async def predict_cascade(text: str = Form(...)):
+    if cascade is None:
+        raise HTTPException(status_code=503, detail="Cascade not available, set OPENAI_API_KEY")
+    try:
+        result = (await cascade.predict_async([text])).iloc[0]
+        label = label_mapping.get(result["label"], "Unknown Label")
+        return JSONResponse(content={"label": label, "source": result["source"], "margin": float(result["margin"])})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {e}")
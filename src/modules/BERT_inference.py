@@ -0,0 +1,122 @@
+import numpy as np
+import torch
+import torch.nn.functional as F
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from itertools import islice
+import time
+
+
+class BertInference:
+    """
+    CPU/GPU inference engine for the fine-tuned distilroberta APA model from bert_finetune.ipynb.
+    Texts are sorted by length and batched with dynamic padding, so short articles are not padded to 512 tokens.
+
+    Example usage:
+
+    engine = BertInference("./apa-model", "./apa-tokenizer", num_threads=8, quantize=True)
+    preds = engine.predict(val_df['text'])
+
+    # Large inputs: predictions are streamed chunk by chunk in input order
+    for preds, probs in engine.predict_stream(full_data['text'], chunk_size=2048):
+        ...
+    """
+
+    def __init__(self, model_path="./apa-model", tokenizer_path="./apa-tokenizer", num_threads=None,
+                 quantize=False, max_length=512, device=None):
+        """
+        Args:
+            model_path (str): directory of model.save_pretrained()
+            tokenizer_path (str): directory of tokenizer.save_pretrained()
+            num_threads (int): torch CPU threads, None keeps the torch default
+            quantize (bool): apply dynamic int8 quantization to the linear layers (CPU only)
+            max_length (int): truncation length in tokens
+            device (str): "cpu" or "cuda", default cuda if available (cpu if quantize)
+        """
+
+        if num_threads is not None:
+            torch.set_num_threads(num_threads)
+
+        if device is None:
+            device = "cuda" if torch.cuda.is_available() and not quantize else "cpu"
+        self.device = torch.device(device)
+        self.max_length = max_length
+
+        self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_path)
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_path)
+        self.model.eval()
+
+        if quantize:
+            self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.model.to(self.device)
+
+    def _predict_chunk(self, texts, batch_size):
+        encodings = self.tokenizer(texts, truncation=True, max_length=self.max_length)
+        input_ids, attention_mask = encodings['input_ids'], encodings['attention_mask']
+
+        # Longest first, so every batch is padded only to similar lengths
+        order = np.argsort([-len(ids) for ids in input_ids], kind="stable")
+        probs = np.zeros((len(texts), self.model.config.num_labels), dtype=np.float32)
+
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+            batch = self.tokenizer.pad({"input_ids": [input_ids[i] for i in idx],
+                                        "attention_mask": [attention_mask[i] for i in idx]}, return_tensors="pt")
+            batch = {key: value.to(self.device) for key, value in batch.items()}
+
+            with torch.inference_mode():
+                logits = self.model(**batch).logits
+            probs[idx] = F.softmax(logits, dim=-1).float().cpu().numpy()
+
+        return probs
+
+    def predict_stream(self, texts, batch_size=32, chunk_size=1024):
+        """
+        Yields (predictions, probabilities) for consecutive chunks of chunk_size texts in input order.
+        texts can be any iterable, e.g. a generator over a large file.
+        """
+
+        texts = iter(texts)
+        while True:
+            chunk = [str(text) for text in islice(texts, chunk_size)]
+            if not chunk:
+                return
+            probs = self._predict_chunk(chunk, batch_size)
+            yield np.argmax(probs, axis=1), probs
+
+    def predict_proba(self, texts, batch_size=32, chunk_size=1024):
+        probs = [p for _, p in self.predict_stream(texts, batch_size=batch_size, chunk_size=chunk_size)]
+        return np.concatenate(probs) if probs else np.zeros((0, self.model.config.num_labels), dtype=np.float32)
+
+    def predict(self, texts, batch_size=32, chunk_size=1024):
+        return np.argmax(self.predict_proba(texts, batch_size=batch_size, chunk_size=chunk_size), axis=1)
+
+    def benchmark(self, texts, batch_size=32):
+        """
+        Compares docs/s of the notebook loop (one text at a time, padding='max_length') with predict().
+
+        Returns: DataFrame with docs/s and the agreement of the predictions
+        """
+
+        import pandas as pd
+
+        texts = [str(text) for text in texts]
+
+        start_t = time.perf_counter()
+        loop_preds = []
+        for text in texts:
+            inputs = self.tokenizer([text], return_tensors="pt", padding='max_length', truncation=True, max_length=self.max_length)
+            inputs = {key: value.to(self.device) for key, value in inputs.items()}
+            with torch.no_grad():
+                logits = self.model(**inputs).logits
+            loop_preds.append(int(torch.argmax(logits, dim=-1)[0]))
+        loop_time = time.perf_counter() - start_t
+
+        start_t = time.perf_counter()
+        preds = self.predict(texts, batch_size=batch_size)
+        engine_time = time.perf_counter() - start_t
+
+        return pd.DataFrame(data=[
+            dict([('Method', 'Per text loop'), ('Docs/s', round(len(texts) / loop_time, 2)), ('Agreement', 1.0)]),
+            dict([('Method', f'Sorted dynamic batches ({batch_size})'), ('Docs/s', round(len(texts) / engine_time, 2)),
+                  ('Agreement', round(float(np.mean(preds == np.array(loop_preds))), 4))])
+            ]).set_index('Method')
@@ -0,0 +1,226 @@
+import numpy as np
+import json
+import os
+import time
+import tempfile
+
+
+def export_model(model, tokenizer, max_len, export_dir, quantization=None, representative_texts=None):
+    """
+    Freezes a trained RNN/CNN Keras model (use_basic_embed=True) together with its tokenizer and max_len
+    and converts it to TensorFlow Lite for CPU inference with TFLitePredictor.
+
+    Example usage:
+
+    export_model(model_lstm, lstm.tokenizer, lstm.max_len, "./export/lstm_int8", quantization="int8")
+    predictor = TFLitePredictor("./export/lstm_int8")
+    labels = predictor.predict(test['text'])
+
+    Args:
+        model: trained Keras model with token ID input of length max_len
+        tokenizer: the fitted Keras Tokenizer (e.g. <self.tokenizer>)
+        max_len (int): sequence length of the model input
+        export_dir (str): directory for model.tflite, tokenizer.json and meta.json
+        quantization (str): None, "float16" or "int8" (dynamic range, weights only)
+        representative_texts (list): with "int8", also quantize activations calibrated on these texts
+    """
+
+    import tensorflow as tf
+    from tensorflow.keras.preprocessing.sequence import pad_sequences
+
+    os.makedirs(export_dir, exist_ok=True)
+
+    # Fix the sequence length and keep a dynamic batch dimension
+    input_spec = tf.TensorSpec([None, max_len], model.inputs[0].dtype)
+    concrete_func = tf.function(lambda x: model(x, training=False)).get_concrete_function(input_spec)
+    converter = tf.lite.TFLiteConverter.from_concrete_functions([concrete_func], model)
+
+    if quantization == "float16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == "int8":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        if representative_texts is not None:
+            sequences = pad_sequences(tokenizer.texts_to_sequences(list(representative_texts)), maxlen=max_len)
+
+            def representative_dataset():
+                for seq in sequences:
+                    yield [seq[None, :].astype(model.inputs[0].dtype.as_numpy_dtype)]
+
+            converter.representative_dataset = representative_dataset
+    elif quantization is not None:
+        raise ValueError(f"Unknown quantization '{quantization}', use None, 'float16' or 'int8'")
+
+    with open(os.path.join(export_dir, "model.tflite"), "wb") as f:
+        f.write(converter.convert())
+
+    config = tokenizer.get_config()
+    with open(os.path.join(export_dir, "tokenizer.json"), "w") as f:
+        json.dump({
+            "word_index": tokenizer.word_index,
+            "num_words": config["num_words"],
+            "filters": config["filters"],
+            "lower": config["lower"],
+            "split": config["split"],
+            "oov_token": config["oov_token"]
+            }, f)
+
+    with open(os.path.join(export_dir, "meta.json"), "w") as f:
+        json.dump({"max_len": max_len, "quantization": quantization}, f)
+
+    print(f"Model exported to {export_dir}")
+
+
+class TFLitePredictor:
+    """
+    Batched CPU predictor for models exported with export_model(). Uses tflite_runtime if installed,
+    so serving does not need the full TensorFlow package, and tokenizes like the Keras Tokenizer.
+    """
+
+    def __init__(self, export_dir, num_threads=None):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            from tensorflow.lite import Interpreter
+
+        with open(os.path.join(export_dir, "meta.json"), "r") as f:
+            meta = json.load(f)
+        with open(os.path.join(export_dir, "tokenizer.json"), "r") as f:
+            vocab = json.load(f)
+
+        self.max_len = meta["max_len"]
+        self.word_index = vocab["word_index"]
+        self.num_words = vocab["num_words"]
+        self.lower = vocab["lower"]
+        self.split = vocab["split"]
+        self.oov_index = self.word_index.get(vocab["oov_token"]) if vocab["oov_token"] is not None else None
+        self.translate_map = str.maketrans({c: self.split for c in vocab["filters"]})
+
+        self.interpreter = Interpreter(model_path=os.path.join(export_dir, "model.tflite"), num_threads=num_threads)
+        self.input_details = self.interpreter.get_input_details()[0]
+        self.output_details = self.interpreter.get_output_details()[0]
+        self.batch_size = None
+
+    def texts_to_sequences(self, texts):
+        """
+        Same output as Tokenizer.texts_to_sequences followed by pad_sequences(maxlen=max_len).
+        """
+
+        X = np.zeros((len(texts), self.max_len), dtype=self.input_details['dtype'])
+        for row, text in enumerate(texts):
+            text = str(text)
+            if self.lower:
+                text = text.lower()
+            seq = []
+            for word in text.translate(self.translate_map).split(self.split):
+                if not word:
+                    continue
+                i = self.word_index.get(word)
+                if i is not None and (not self.num_words or i < self.num_words):
+                    seq.append(i)
+                elif self.oov_index is not None:
+                    seq.append(self.oov_index)
+            # Pre padding and pre truncation like pad_sequences
+            seq = seq[-self.max_len:]
+            if seq:
+                X[row, -len(seq):] = seq
+        return X
+
+    def predict_proba(self, texts, batch_size=64):
+        """
+        Returns: array (len(texts), num_classes) of class probabilities
+        """
+
+        texts = list(texts)
+        outputs = []
+        for start in range(0, len(texts), batch_size):
+            X = self.texts_to_sequences(texts[start:start + batch_size])
+
+            # Resize only when the batch size changes (last batch)
+            if self.batch_size != len(X):
+                self.interpreter.resize_tensor_input(self.input_details['index'], [len(X), self.max_len])
+                self.interpreter.allocate_tensors()
+                self.batch_size = len(X)
+
+            self.interpreter.set_tensor(self.input_details['index'], X)
+            self.interpreter.invoke()
+            outputs.append(self.interpreter.get_tensor(self.output_details['index']).copy())
+
+        if not outputs:
+            return np.zeros((0, self.output_details['shape'][-1]), dtype=self.output_details['dtype'])
+        return np.concatenate(outputs)
+
+    def predict(self, texts, batch_size=64):
+        return np.argmax(self.predict_proba(texts, batch_size=batch_size), axis=1)
+
+
+def compare_export(model, tokenizer, max_len, texts, labels, export_root, batch_size=64,
+                   quantizations=(None, "float16", "int8")):
+    """
+    Exports the model with every quantization and compares it against the Keras model on texts/labels.
+
+    Returns: DataFrame with accuracy, accuracy loss, model size, cold-start time and per-batch latency
+    """
+
+    import tensorflow as tf
+    from tensorflow.keras.preprocessing.sequence import pad_sequences
+    import pandas as pd
+
+    texts, labels = list(texts), np.asarray(labels)
+    perform_list = []
+
+    def latency(predict_fn):
+        start_t = time.perf_counter()
+        n_batches = 0
+        for start in range(0, len(texts), batch_size):
+            predict_fn(texts[start:start + batch_size])
+            n_batches += 1
+        return (time.perf_counter() - start_t) / max(n_batches, 1)
+
+    # Keras baseline, cold start is loading the saved model plus one batch
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_path = os.path.join(tmp_dir, "model.h5")
+        # Without optimizer state (Adam would roughly triple the size), TFLite does not keep it either
+        model.save(model_path, include_optimizer=False)
+        size = os.path.getsize(model_path)
+
+        start_t = time.perf_counter()
+        keras_model = tf.keras.models.load_model(model_path)
+        keras_model.predict(pad_sequences(tokenizer.texts_to_sequences(texts[:batch_size]), maxlen=max_len), verbose=0)
+        cold_start = time.perf_counter() - start_t
+
+    def keras_predict(batch):
+        return np.argmax(keras_model.predict(pad_sequences(tokenizer.texts_to_sequences(batch), maxlen=max_len), verbose=0), axis=1)
+
+    keras_latency = latency(keras_predict)
+    keras_accuracy = np.mean(keras_predict(texts) == labels)
+    perform_list.append(dict([
+        ('Model', 'Keras'),
+        ('Accuracy', round(keras_accuracy, 4)),
+        ('Accuracy Loss', 0.0),
+        ('Size (MB)', round(size / 1024**2, 2)),
+        ('Cold Start (s)', round(cold_start, 3)),
+        ('Latency (ms/batch)', round(keras_latency * 1000, 2))
+        ]))
+
+    for quantization in quantizations:
+        export_dir = os.path.join(export_root, quantization or "float32")
+        export_model(model, tokenizer, max_len, export_dir, quantization=quantization)
+
+        start_t = time.perf_counter()
+        predictor = TFLitePredictor(export_dir)
+        predictor.predict(texts[:batch_size], batch_size=batch_size)
+        cold_start = time.perf_counter() - start_t
+
+        tflite_latency = latency(lambda batch: predictor.predict(batch, batch_size=batch_size))
+        accuracy = np.mean(predictor.predict(texts, batch_size=batch_size) == labels)
+        perform_list.append(dict([
+            ('Model', f'TFLite ({quantization or "float32"})'),
+            ('Accuracy', round(accuracy, 4)),
+            ('Accuracy Loss', round(keras_accuracy - accuracy, 4)),
+            ('Size (MB)', round(os.path.getsize(os.path.join(export_dir, "model.tflite")) / 1024**2, 2)),
+            ('Cold Start (s)', round(cold_start, 3)),
+            ('Latency (ms/batch)', round(tflite_latency * 1000, 2))
+            ]))
+
+    return pd.DataFrame(data=perform_list).set_index('Model')
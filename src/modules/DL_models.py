@@ -1,10 +1,240 @@
-from tensorflow.keras.preprocessing.text import Tokenizer
+from tensorflow.keras.preprocessing.text import Tokenizer, tokenizer_from_json
 from tensorflow.keras.preprocessing.sequence import pad_sequences
 from tensorflow.keras.layers import Embedding, LSTM, Dense, Dropout, GlobalMaxPool1D, Reshape, Bidirectional, Conv1D, MaxPooling1D, Flatten
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.callbacks import EarlyStopping
 import tensorflow as tf
 from sklearn.model_selection import train_test_split
+import numpy as np
+import pandas as pd
+import time
+import hashlib
+import json
+import os
+
+
+class SharedTokenizer:
+    """
+    Keras Tokenizer shared by RNN and CNN. If cache_dir is given, the fitted vocabulary is saved there
+    and the token ID sequences of every split are written once to a flat memory-mapped int32 buffer
+    plus an offsets array, so later runs (and inference) load them without re-tokenizing.
+    
+    Example usage:
+    
+    shared = SharedTokenizer(max_words=10000, cache_dir="./cache/tokenizer")
+    shared.fit(train['text'])
+    train_seq = shared.texts_to_sequences(train['text'], name="train")
+    
+    # Inference with the exact training vocabulary
+    shared = SharedTokenizer.load("./cache/tokenizer")
+    """
+    
+    def __init__(self, max_words=10000, cache_dir=None):
+        self.max_words = max_words
+        self.cache_dir = cache_dir
+        self.tokenizer = None
+        self.tokenizer_key = None
+        
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+    
+    @classmethod
+    def load(cls, cache_dir):
+        meta = cls._read_meta(cache_dir)
+        if "tokenizer_key" not in meta:
+            raise FileNotFoundError(f"No fitted tokenizer in {cache_dir}")
+        
+        shared = cls(max_words=meta["max_words"], cache_dir=cache_dir)
+        with open(os.path.join(cache_dir, "tokenizer.json"), "r") as f:
+            shared.tokenizer = tokenizer_from_json(f.read())
+        shared.tokenizer_key = meta["tokenizer_key"]
+        return shared
+    
+    @staticmethod
+    def hash_texts(texts, prefix=""):
+        h = hashlib.sha1(prefix.encode("utf-8"))
+        for text in texts:
+            h.update(str(text).encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+    
+    @staticmethod
+    def _read_meta(cache_dir):
+        path = os.path.join(cache_dir, "meta.json")
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r") as f:
+            return json.load(f)
+    
+    def _write_meta(self, meta):
+        tmp_path = os.path.join(self.cache_dir, "meta.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(self.cache_dir, "meta.json"))
+    
+    def fit(self, texts):
+        """
+        Fits the tokenizer on texts or loads the saved one if it was fitted on the same texts.
+        """
+        
+        key = self.hash_texts(texts, prefix=str(self.max_words))
+        
+        if self.cache_dir is not None:
+            meta = self._read_meta(self.cache_dir)
+            if meta.get("tokenizer_key") == key:
+                with open(os.path.join(self.cache_dir, "tokenizer.json"), "r") as f:
+                    self.tokenizer = tokenizer_from_json(f.read())
+                self.tokenizer_key = key
+                print("Loaded cached tokenizer")
+                return self.tokenizer
+        
+        self.tokenizer = Tokenizer(num_words=self.max_words)
+        self.tokenizer.fit_on_texts(texts)
+        self.tokenizer_key = key
+        
+        if self.cache_dir is not None:
+            # Swap the vocabulary in like the sequence files, readers never see a partial file
+            tmp_path = os.path.join(self.cache_dir, "tokenizer.json.tmp")
+            with open(tmp_path, "w") as f:
+                f.write(self.tokenizer.to_json())
+            os.replace(tmp_path, os.path.join(self.cache_dir, "tokenizer.json"))
+            # New vocabulary invalidates all cached sequences
+            self._write_meta({"max_words": self.max_words, "tokenizer_key": key, "splits": {}})
+            
+        return self.tokenizer
+    
+    def texts_to_sequences(self, texts, name=None):
+        """
+        Returns: list of int32 sequences. If cache_dir and name are given, the sequences are views
+        into the memory-mapped cache of that name, written on the first call.
+        """
+        
+        if self.tokenizer is None:
+            raise ValueError("Tokenizer not fitted, call <self.fit> first")
+        
+        if self.cache_dir is None or name is None:
+            return [np.asarray(seq, dtype=np.int32) for seq in self.tokenizer.texts_to_sequences(texts)]
+        
+        ids_path = os.path.join(self.cache_dir, f"{name}_ids.int32")
+        offsets_path = os.path.join(self.cache_dir, f"{name}_offsets.npy")
+        key = self.hash_texts(texts, prefix=self.tokenizer_key)
+        meta = self._read_meta(self.cache_dir)
+        
+        if meta.get("splits", {}).get(name) != key:
+            sequences = self.tokenizer.texts_to_sequences(texts)
+            offsets = np.zeros(len(sequences) + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum([len(seq) for seq in sequences])
+            
+            # Write to temporary files and swap them in, the old files may still be mapped by other instances
+            # np.memmap cannot map an empty file
+            tmp_ids_path = ids_path + ".tmp"
+            ids = np.memmap(tmp_ids_path, dtype=np.int32, mode="w+", shape=(max(int(offsets[-1]), 1),))
+            for i, seq in enumerate(sequences):
+                ids[offsets[i]:offsets[i + 1]] = seq
+            ids.flush()
+            del ids
+            tmp_offsets_path = offsets_path + ".tmp.npy"
+            np.save(tmp_offsets_path, offsets)
+            os.replace(tmp_ids_path, ids_path)
+            os.replace(tmp_offsets_path, offsets_path)
+            
+            meta.setdefault("splits", {})[name] = key
+            self._write_meta(meta)
+        else:
+            print(f"Loaded cached sequences <{name}>")
+        
+        ids = np.memmap(ids_path, dtype=np.int32, mode="r")
+        offsets = np.load(offsets_path)
+        return [ids[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+
+
+class EmbeddingCache:
+    """
+    Disk cache of sentence embeddings from a frozen embedding layer (e.g. the nnlm hub.KerasLayer).
+    Vectors are stored as a memory-mapped float32 matrix keyed by the sha1 hash of the text, so every text
+    is embedded only once and later runs do not need the embedding layer (or a hub download) at all.
+    Use one cache_dir per embedding model.
+    
+    Example usage:
+    
+    cache = EmbeddingCache("./cache/nnlm_de_128")
+    X_train = cache.embed(train['text'], hub_layer_de_128)
+    X_test = cache.embed(test['text'])  # no layer needed if all texts are cached
+    """
+    
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.vectors_path = os.path.join(cache_dir, "vectors.float32")
+        self.keys_path = os.path.join(cache_dir, "keys.json")
+        self.dim = None
+        self.index = {}
+        
+        os.makedirs(cache_dir, exist_ok=True)
+        if os.path.exists(self.keys_path):
+            with open(self.keys_path, "r") as f:
+                meta = json.load(f)
+            self.dim = meta["dim"]
+            self.index = meta["rows"]
+    
+    @staticmethod
+    def hash_text(text):
+        return hashlib.sha1(str(text).encode("utf-8")).hexdigest()
+    
+    def _save_keys(self):
+        tmp_path = self.keys_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"dim": self.dim, "rows": self.index}, f)
+        os.replace(tmp_path, self.keys_path)
+    
+    def embed(self, texts, embedding_layer=None, batch_size=1024):
+        """
+        Returns: float32 array (len(texts), dim) of the embeddings of texts.
+        Texts missing from the cache are embedded with embedding_layer in batches of batch_size and appended.
+        """
+        
+        texts = [str(text) for text in texts]
+        keys = [self.hash_text(text) for text in texts]
+        
+        missing, seen = [], set()
+        for text, key in zip(texts, keys):
+            if key not in self.index and key not in seen:
+                missing.append((key, text))
+                seen.add(key)
+        
+        if missing:
+            if embedding_layer is None:
+                raise ValueError(f"{len(missing)} texts are not cached and no embedding layer was given")
+            
+            print(f"Embedding {len(missing)} new texts")
+            # Rows follow the file, so vectors of an interrupted run without saved keys are skipped
+            # and a partially written last row is cut off before appending
+            row = 0
+            if self.dim is None:
+                open(self.vectors_path, "wb").close()
+            elif os.path.exists(self.vectors_path):
+                row = os.path.getsize(self.vectors_path) // (4 * self.dim)
+            else:
+                open(self.vectors_path, "wb").close()
+                
+            with open(self.vectors_path, "r+b") as f:
+                f.truncate(row * 4 * self.dim if self.dim is not None else 0)
+                f.seek(0, os.SEEK_END)
+                for start in range(0, len(missing), batch_size):
+                    batch = missing[start:start + batch_size]
+                    vectors = np.asarray(embedding_layer(tf.constant([text for _, text in batch])), dtype=np.float32)
+                    if self.dim is None:
+                        self.dim = vectors.shape[1]
+                    f.write(vectors.tobytes())
+                    for key, _ in batch:
+                        self.index[key] = row
+                        row += 1
+            self._save_keys()
+        
+        if not texts:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        
+        vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r").reshape(-1, self.dim)
+        return np.asarray(vectors[[self.index[key] for key in keys]])
 
 
 class RNN:
@@ -23,20 +253,26 @@ class RNN:
         self.train_seq = None
         self.test_seq = None
         self.val_seq = None
+        self.tokenizer = None
+        self.shared_tokenizer = None
         
-    def tokenize(self, train, test, val=None):
+    def tokenize(self, train, test, val=None, cache_dir=None):
+        """
+        Fits the tokenizer on train and tokenizes all splits. If cache_dir is given, the vocabulary and
+        the sequences are cached there (see SharedTokenizer) and reused on later runs.
+        """
         
         self.X_train, self.X_test = train['text'], test['text']
         self.y_train, self.y_test = train['label_ids'], test['label_ids']
         
-        tokenizer = Tokenizer(num_words=self.max_words)
-        tokenizer.fit_on_texts(self.X_train)
-        self.train_seq = tokenizer.texts_to_sequences(self.X_train)
-        self.test_seq = tokenizer.texts_to_sequences(self.X_test)
+        self.shared_tokenizer = SharedTokenizer(max_words=self.max_words, cache_dir=cache_dir)
+        self.tokenizer = self.shared_tokenizer.fit(self.X_train)
+        self.train_seq = self.shared_tokenizer.texts_to_sequences(self.X_train, name="train")
+        self.test_seq = self.shared_tokenizer.texts_to_sequences(self.X_test, name="test")
         
         if val is not None and not val.empty:
             self.X_val, self.y_val = val['text'], val['label_ids']
-            self.val_seq = tokenizer.texts_to_sequences(self.X_val)
+            self.val_seq = self.shared_tokenizer.texts_to_sequences(self.X_val, name="val")
             
         print("Attributes updated, use <self.train_seq> etc. to use values")
     
@@ -54,13 +290,170 @@ class RNN:
         
         return X_train, X_test, y_train, y_test
     
-    def build_model(self, use_basic_embed: bool, reshape=50, optimizer = "adam"):
+    def make_dataset(self, split="train", batch_size=32, max_len=None, bucket_boundaries=None, shuffle=None):
+        """
+        Streaming alternative to pad_and_label_preproc. Streams the token ID sequences from tokenize()
+        as a ragged tensor, truncates and one-hot encodes them in a graph-native parallel map,
+        buckets them by length and pads every batch only to its own longest member,
+        so the full padded matrix is never materialized. Call tokenize() first.
+        
+        The Keras Tokenizer holds the GIL, so tokenization stays in tokenize() (cached with cache_dir)
+        instead of running in the map, where num_parallel_calls would give no parallelism.
+        
+        Example usage:
+        
+        train_ds = lstm.make_dataset("train", batch_size=64)
+        val_ds = lstm.make_dataset("val", batch_size=64)
+        model, early_stop = lstm.build_model(use_basic_embed=True, variable_length=True)
+        model.fit(train_ds, validation_data=val_ds, epochs=10, callbacks=[early_stop])
+        
+        Args:
+            split (str): "train", "test" or "val"
+            batch_size (int): batch size of every bucket
+            max_len (int): truncate longer sequences (keeps the last tokens like pad_sequences), None keeps full texts
+            bucket_boundaries (list): sequence length boundaries, default are the train length quantiles
+            shuffle (bool): shuffle before bucketing, default only for the train split
+        """
+        
+        sequences, labels = {"train": (self.train_seq, self.y_train),
+                             "test": (self.test_seq, self.y_test),
+                             "val": (self.val_seq, self.y_val)}[split]
+        if sequences is None:
+            raise ValueError(f"No sequences for split '{split}', call <self.tokenize> first")
+        
+        if bucket_boundaries is None:
+            lengths = [len(seq) for seq in self.train_seq]
+            bucket_boundaries = sorted(set(int(b) for b in np.quantile(lengths, [0.1, 0.25, 0.5, 0.75, 0.9]) if b > 0))
+        if shuffle is None:
+            shuffle = split == "train"
+        
+        # Flat IDs plus row splits, unpadded
+        row_splits = np.zeros(len(sequences) + 1, dtype=np.int64)
+        row_splits[1:] = np.cumsum([len(seq) for seq in sequences])
+        values = np.concatenate([np.asarray(seq, dtype=np.int32) for seq in sequences]) if row_splits[-1] else np.zeros(0, dtype=np.int32)
+        ragged = tf.RaggedTensor.from_row_splits(values, row_splits)
+        
+        def sequence_map(seq, label):
+            if max_len is not None:
+                seq = seq[-max_len:]
+            # Empty sequences would give zero length batches
+            seq = tf.cond(tf.size(seq) > 0, lambda: seq, lambda: tf.zeros([1], dtype=tf.int32))
+            return seq, tf.one_hot(label, self.num_classes)
+        
+        dataset = tf.data.Dataset.from_tensor_slices((ragged, np.asarray(labels, dtype=np.int32)))
+        if shuffle:
+            dataset = dataset.shuffle(len(sequences), reshuffle_each_iteration=True)
+        dataset = dataset.map(sequence_map, num_parallel_calls=tf.data.AUTOTUNE)
+        dataset = dataset.apply(tf.data.experimental.bucket_by_sequence_length(
+            element_length_func=lambda seq, label: tf.shape(seq)[0],
+            bucket_boundaries=bucket_boundaries,
+            bucket_batch_sizes=[batch_size] * (len(bucket_boundaries) + 1),
+            pad_to_bucket_boundary=False))
+        
+        return dataset.prefetch(tf.data.AUTOTUNE)
+    
+    def compare_pipelines(self, batch_size=32, epochs=1, optimizer="adam", **build_kwargs):
+        """
+        Trains the basic embedding model once on the fixed max_len padded matrix and once on the
+        length bucketed make_dataset() pipeline and compares throughput and input memory.
+        Call tokenize() first. Tokenization is done by tokenize() for both pipelines and is not
+        part of the measured throughput, since the Keras Tokenizer cannot run in a parallel tf.data map.
+        
+        Input memory is the padded matrix for the fixed path and, for the bucketed path, the ragged
+        sequences, the train shuffle buffer and two padded batches.
+        
+        Returns: DataFrame with samples/s, padded tokens per epoch and input memory for both pipelines
+        """
+        
+        perform_list = []
+        n_samples = len(self.train_seq)
+        
+        # Fixed max_len padding
+        arrays = self.pad_and_label_preproc()
+        X_train, y_train = arrays[0], arrays[len(arrays) // 2]
+        model, _ = self.build_model(use_basic_embed=True, optimizer=optimizer, **build_kwargs)
+        start_t = time.perf_counter()
+        model.fit(X_train, y_train, batch_size=batch_size, epochs=epochs, verbose=0)
+        runtime = time.perf_counter() - start_t
+        perform_list.append(dict([
+            ('Pipeline', f'Fixed padding ({self.max_len})'),
+            ('Samples/s', round(n_samples * epochs / runtime, 2)),
+            ('Padded Tokens', X_train.size),
+            ('Input Memory (MB)', round((X_train.nbytes + y_train.nbytes) / 1024**2, 2))
+            ]))
+        del X_train, y_train, arrays
+        
+        # Length bucketed streaming
+        dataset = self.make_dataset("train", batch_size=batch_size)
+        padded_tokens, max_batch_bytes = 0, 0
+        for seq, label in dataset:
+            padded_tokens += int(tf.size(seq))
+            max_batch_bytes = max(max_batch_bytes, seq.numpy().nbytes + label.numpy().nbytes)
+        model, _ = self.build_model(use_basic_embed=True, optimizer=optimizer, variable_length=True, **build_kwargs)
+        start_t = time.perf_counter()
+        model.fit(dataset, epochs=epochs, verbose=0)
+        runtime = time.perf_counter() - start_t
+        
+        # The ragged values, row splits and labels are embedded in the pipeline as constants,
+        # the full shuffle buffer holds every unpadded sequence and label once more,
+        # plus the batch in use and one prefetched batch
+        n_tokens = sum(len(seq) for seq in self.train_seq)
+        ragged_bytes = n_tokens * 4 + (n_samples + 1) * 8 + n_samples * 4
+        shuffle_bytes = n_tokens * 4 + n_samples * 4
+        perform_list.append(dict([
+            ('Pipeline', 'Length bucketed'),
+            ('Samples/s', round(n_samples * epochs / runtime, 2)),
+            ('Padded Tokens', padded_tokens),
+            ('Input Memory (MB)', round((ragged_bytes + shuffle_bytes + max_batch_bytes * 2) / 1024**2, 2))
+            ]))
+        
+        return pd.DataFrame(data=perform_list).set_index('Pipeline')
+    
+    def export(self, model, export_dir, quantization=None, representative_texts=None):
+        """
+        Exports a trained basic embedding model with <self.tokenizer> and <self.max_len> to TensorFlow Lite,
+        load it with DL_export.TFLitePredictor. quantization is None, "float16" or "int8".
+        """
+        
+        # Works both as DL_models (modules dir on sys.path) and as modules.DL_models
+        try:
+            from DL_export import export_model
+        except ImportError:
+            from .DL_export import export_model
+        
+        if self.tokenizer is None:
+            raise ValueError("Tokenizer not fitted, call <self.tokenize> first")
+        export_model(model, self.tokenizer, self.max_len, export_dir, quantization=quantization,
+                     representative_texts=representative_texts)
+    
+    def embed_cached(self, texts, cache_dir, batch_size=1024):
+        """
+        Embeds texts once with the frozen <self.embedding> layer and caches the vectors in cache_dir
+        (see EmbeddingCache). Use with build_model(use_basic_embed=False, precomputed_embed=True)
+        to train the head directly on the cached vectors.
+        
+        Example usage:
+        
+        lstm.embedding = hub_layer_de_128
+        X_train = lstm.embed_cached(train['text'], "./cache/nnlm_de_128")
+        X_test = lstm.embed_cached(test_sampled['text'], "./cache/nnlm_de_128")
+        lstm_model, early_stop = lstm.build_model(use_basic_embed=False, reshape=128, precomputed_embed=True)
+        lstm_model.fit(X_train, y_train, batch_size=64, epochs=100, callbacks=[early_stop], validation_data=(X_test, y_test))
+        """
+        
+        return EmbeddingCache(cache_dir).embed(texts, self.embedding, batch_size=batch_size)
+    
+    def build_model(self, use_basic_embed: bool, reshape=50, optimizer = "adam", variable_length=False, precomputed_embed=False):
         
         if use_basic_embed:
             
             model = Sequential()
             # KERAS 3 version model.add(Embedding(input_dim = self.max_words, output_dim = 200, input_shape = (self.max_len, )))
-            model.add(Embedding(input_dim = self.max_words, output_dim = 200, input_length = self.max_len, ))
+            if variable_length:
+                # Batches from make_dataset() have their own length
+                model.add(Embedding(input_dim = self.max_words, output_dim = 200))
+            else:
+                model.add(Embedding(input_dim = self.max_words, output_dim = 200, input_length = self.max_len, ))
             print("Using basic embedding")
             model.add(Bidirectional(LSTM(128, return_sequences=True)))
             model.add(Dropout(0.5))
@@ -76,8 +469,12 @@ class RNN:
         else:
             model = Sequential()
             
-            model.add(self.embedding)
-            model.add(Reshape((1, reshape)))
+            if precomputed_embed:
+                # Input are the cached vectors from embed_cached()
+                model.add(Reshape((1, reshape), input_shape=(reshape, )))
+            else:
+                model.add(self.embedding)
+                model.add(Reshape((1, reshape)))
 
             model.add(Bidirectional(LSTM(128, return_sequences=True)))
             model.add(Dropout(0.5))
@@ -107,22 +504,6 @@ class CNN(RNN):
         self.filters = 16
         self.kernel_size = 3
         
-    def tokenize(self, train, test, val=None):
-        
-        self.X_train, self.X_test = train['text'], test['text']
-        self.y_train, self.y_test = train['label_ids'], test['label_ids']
-        
-        tokenizer = Tokenizer(num_words=self.max_words)
-        tokenizer.fit_on_texts(self.X_train)
-        self.train_seq = tokenizer.texts_to_sequences(self.X_train)
-        self.test_seq = tokenizer.texts_to_sequences(self.X_test)
-        
-        if val is not None and not val.empty:
-            self.X_val, self.y_val = val['text'], val['label_ids']
-            self.val_seq = tokenizer.texts_to_sequences(self.X_val)
-            
-        print("Attributes updated, use <self.train_seq> etc. to use values")
-    
     def pad_and_label_preproc(self):
         
         X_train = pad_sequences(self.train_seq, maxlen = self.max_len)
@@ -137,26 +518,37 @@ class CNN(RNN):
         
         return X_train, X_test, y_train, y_test
     
-    def build_model(self, use_basic_embed: bool, reshape=50, add_globalmaxpool=False, optimizer="adam"):
+    def build_model(self, use_basic_embed: bool, reshape=50, add_globalmaxpool=False, optimizer="adam", variable_length=False, precomputed_embed=False):
         
         if use_basic_embed:
             
             model = Sequential()
             # KERAS 3 version model.add(Embedding(input_dim = self.max_words, output_dim = 200, input_shape = (self.max_len, )))
-            model.add(Embedding(input_dim = self.max_words, output_dim = 200, input_length = self.max_len, ))
+            if variable_length:
+                # Batches from make_dataset() have their own length
+                model.add(Embedding(input_dim = self.max_words, output_dim = 200))
+            else:
+                model.add(Embedding(input_dim = self.max_words, output_dim = 200, input_length = self.max_len, ))
             print("Using basic embedding")
             model.add(Dropout(0.5))
             
+            # Short sequences from make_dataset() must not be pooled down to length 0
+            pool_padding = 'same' if variable_length else 'valid'
+            
             model.add(Conv1D(128, self.kernel_size, padding='same', activation='relu'))
-            model.add(MaxPooling1D())
+            model.add(MaxPooling1D(padding=pool_padding))
             
             model.add(Conv1D(64, self.kernel_size, padding='same', activation='relu'))
-            model.add(MaxPooling1D())
+            model.add(MaxPooling1D(padding=pool_padding))
             
             model.add(Conv1D(32, self.kernel_size, padding='same', activation='relu'))
-            model.add(MaxPooling1D())
+            model.add(MaxPooling1D(padding=pool_padding))
             
-            model.add(Flatten())
+            if variable_length:
+                # Flatten needs a fixed length
+                model.add(GlobalMaxPool1D())
+            else:
+                model.add(Flatten())
             
             model.add(Dense(256, activation='relu'))
             model.add(Dropout(0.5))
@@ -167,8 +559,12 @@ class CNN(RNN):
         else:
             model = Sequential()
             # KERAS 3 version model.add(Embedding(input_dim = self.max_words, output_dim = 200, input_shape = (self.max_len, )))
-            model.add(self.embedding)
-            model.add(Reshape((1, reshape)))
+            if precomputed_embed:
+                # Input are the cached vectors from embed_cached()
+                model.add(Reshape((1, reshape), input_shape=(reshape, )))
+            else:
+                model.add(self.embedding)
+                model.add(Reshape((1, reshape)))
             print("Using custom embedding")
             model.add(Dropout(0.3))
             
@@ -14,6 +14,11 @@ from sklearn.model_selection import RandomizedSearchCV
 from scipy.stats import uniform, randint, loguniform
 import warnings
 import time
+import pickle
+import threading
+import os
+import gc
+import ctypes
 
 
 class ML_Models():
@@ -26,7 +31,15 @@ class ML_Models():
         self.y_train = None
         self.y_test = None
         
-    def run(self, train, test):
+    def run(self, train, test, profile=True, n_latency_samples=100):
+        """
+        Fits every baseline model on TF-IDF features and returns the performance table.
+
+        If profile is True, the table also contains the cost of each model:
+        fit wall time, predict latency per document (single and batched, including vectorization),
+        peak process memory (RSS) during fit, pickled model size and the CPU time split between
+        vectorization and estimation. Single document latency is averaged over n_latency_samples test documents.
+        """
         
         X_train, y_train = train['text'], train['label_ids']
         X_test, y_test = test['text'], test['label_ids']
@@ -38,8 +51,10 @@ class ML_Models():
         
         # Vectorizing text data
         vectorizer = TfidfVectorizer()
+        cpu_start = time.process_time()
         X_train_vectorized = vectorizer.fit_transform(X_train)
         X_test_vectorized = vectorizer.transform(X_test)
+        vectorize_cpu = time.process_time() - cpu_start
         
         self.X_train_vectorized = X_train_vectorized
         self.X_test_vectorized = X_test_vectorized
@@ -59,8 +74,17 @@ class ML_Models():
             elif model_name == 'Decision Tree Classifier':
                 mdl = DecisionTreeClassifier()
 
-            mdl.fit(X_train_vectorized, y_train)
-            y_pred = mdl.predict(X_test_vectorized)
+            if profile:
+                cpu_start = time.process_time()
+                fit_time, peak_memory = self.measure_fit(mdl, X_train_vectorized, y_train)
+                y_pred = mdl.predict(X_test_vectorized)
+                estimate_cpu = time.process_time() - cpu_start
+                
+                latency_single, latency_batch = self.measure_latency(vectorizer, mdl, X_test, n_latency_samples)
+                model_size = len(pickle.dumps(mdl))
+            else:
+                mdl.fit(X_train_vectorized, y_train)
+                y_pred = mdl.predict(X_test_vectorized)
 
             # Performance metrics
             accuracy = round(accuracy_score(y_test, y_pred), 2)
@@ -70,7 +94,7 @@ class ML_Models():
             print(f"{model_name}\n{classification_report(y_test, y_pred)}\n")
 
             # Add performance parameters to list
-            perform_list.append(dict([
+            performance = dict([
                 ('Model', model_name),
                 ('Test Accuracy', round(accuracy, 2)),
                 ('Precision (Macro)', round(precision_macro, 2)),
@@ -79,7 +103,21 @@ class ML_Models():
                 ('Precision (Weighted)', round(precision_weighted, 2)),
                 ('Recall (Weighted)', round(recall_weighted, 2)),
                 ('F1 (Weighted)', round(f1score_weighted, 2))
-                ]))
+                ])
+            
+            # Add cost parameters
+            if profile:
+                performance.update(dict([
+                    ('Fit Time (s)', round(fit_time, 4)),
+                    ('Latency Single (ms/doc)', round(latency_single * 1000, 4)),
+                    ('Latency Batch (ms/doc)', round(latency_batch * 1000, 4)),
+                    ('Peak Fit RSS (MB)', round(peak_memory / 1024**2, 2)),
+                    ('Model Size (KB)', round(model_size / 1024, 2)),
+                    ('CPU Vectorization (s)', round(vectorize_cpu, 4)),
+                    ('CPU Estimation (s)', round(estimate_cpu, 4))
+                    ]))
+                
+            perform_list.append(performance)
 
         model_names = ['Logistic Regression', 'Random Forest', 'Naive Bayes', 
                        'Support Vector Classifer','Decision Tree Classifier']
@@ -89,14 +127,130 @@ class ML_Models():
 
         # Create Dataframe of Model, Accuracy, Precision, Recall, and F1
         model_performance = pd.DataFrame(data=perform_list)
-        model_performance = model_performance[['Model', 'Test Accuracy', 'Precision (Macro)', 'Recall (Macro)', 
-                                               'F1 (Macro)', 'Precision (Weighted)', 'Recall (Weighted)', 'F1 (Weighted)']]
+        columns = ['Model', 'Test Accuracy', 'Precision (Macro)', 'Recall (Macro)', 
+                   'F1 (Macro)', 'Precision (Weighted)', 'Recall (Weighted)', 'F1 (Weighted)']
+        if profile:
+            columns += ['Fit Time (s)', 'Latency Single (ms/doc)', 'Latency Batch (ms/doc)', 'Peak Fit RSS (MB)',
+                        'Model Size (KB)', 'CPU Vectorization (s)', 'CPU Estimation (s)']
+        model_performance = model_performance[columns]
         model_performance = model_performance.set_index('Model')
         return model_performance
+    
+    def measure_fit(self, model, X, y, interval=0.01):
+        """
+        Fits model while a background thread samples the process RSS every interval seconds.
+        Unlike tracemalloc this includes native allocations (libsvm, liblinear, tree builders)
+        and does not slow down the fit.
+        
+        Before the fit, freed heap memory is returned to the OS (gc + malloc_trim on glibc), so the baseline
+        is reset per model. Without that, models fitted after e.g. Random Forest would reuse its freed
+        memory and report about 0 MB. Where malloc_trim is not available the value is a lower bound.
+        
+        Returns: (fit wall time in seconds, peak RSS during fit minus RSS before fit in bytes,
+        NaN if the RSS cannot be read)
+        """
+        
+        gc.collect()
+        try:
+            ctypes.CDLL("libc.so.6").malloc_trim(0)
+        except (OSError, AttributeError):
+            pass
+        
+        baseline = self.current_rss()
+        peak = [baseline]
+        done = threading.Event()
+        
+        def sample():
+            while not done.is_set():
+                peak[0] = max(peak[0], self.current_rss())
+                done.wait(interval)
+        
+        if baseline is not None:
+            sampler = threading.Thread(target=sample, daemon=True)
+            sampler.start()
+        start_t = time.perf_counter()
+        try:
+            model.fit(X, y)
+        finally:
+            fit_time = time.perf_counter() - start_t
+            if baseline is not None:
+                done.set()
+                sampler.join()
+        
+        if baseline is None:
+            return fit_time, float('nan')
+        peak[0] = max(peak[0], self.current_rss())
+        return fit_time, peak[0] - baseline
+    
+    @staticmethod
+    def current_rss():
+        """
+        Returns: resident set size of this process in bytes, via psutil or /proc on Linux, None if unavailable
+        """
+        
+        try:
+            import psutil
+            return psutil.Process().memory_info().rss
+        except ImportError:
+            pass
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError):
+            return None
+    
+    def measure_latency(self, vectorizer, model, texts, n_samples=100):
+        """
+        Measures end-to-end predict latency (vectorization + prediction) in seconds per document.
+        
+        Returns: (single, batch) where single is the mean latency of one-document calls over
+        the first n_samples texts and batch is the latency of one call on all texts divided by their number.
+        """
+        
+        texts = list(texts)
+        sample = texts[:n_samples]
+        
+        start_t = time.perf_counter()
+        for text in sample:
+            model.predict(vectorizer.transform([text]))
+        single = (time.perf_counter() - start_t) / max(len(sample), 1)
+        
+        start_t = time.perf_counter()
+        model.predict(vectorizer.transform(texts))
+        batch = (time.perf_counter() - start_t) / max(len(texts), 1)
+        
+        return single, batch
 
-    def plot_performance(self, model_performance, average_val: str):
+    def plot_performance(self, model_performance, average_val: str, pareto=False):
+        
+        """
+        Plots the metrics of the run() table. average_val is "weighted", "macro" or anything else for both.
+        
+        If pareto is True, plots test accuracy against batched latency and model size instead
+        and connects the pareto optimal models (table must come from run(profile=True)).
+        """
+        
+        if pareto:
+            
+            fig, ax = plt.subplots(nrows=1, ncols=2, figsize=(14,6))
+            for i, cost in enumerate(['Latency Batch (ms/doc)', 'Model Size (KB)']):
+                ax[i].scatter(model_performance[cost], model_performance['Test Accuracy'])
+                for model_name, row in model_performance.iterrows():
+                    ax[i].annotate(model_name, (row[cost], row['Test Accuracy']), textcoords="offset points", xytext=(5,5))
+                    
+                # Pareto front: cheaper than all models with higher or equal accuracy
+                front = model_performance.sort_values(by=[cost, 'Test Accuracy'], ascending=[True, False])
+                front = front[front['Test Accuracy'] > front['Test Accuracy'].cummax().shift(fill_value=-np.inf)]
+                ax[i].step(front[cost], front['Test Accuracy'], where='post', color='red', linestyle='--', label='Pareto front')
+                
+                ax[i].set_xscale('log')
+                ax[i].set_xlabel(cost)
+                ax[i].set_ylabel('Test Accuracy')
+                ax[i].legend()
+            fig.suptitle("Accuracy vs Cost", fontsize=16)
+            fig.tight_layout()
         
-        if average_val == "weighted":
+        elif average_val == "weighted":
             
             fig, ax = plt.subplots(nrows=2, ncols=2, figsize=(8,8))
             model_performance['Test Accuracy'].sort_values(ascending=False).plot(kind='bar', ax=ax[0,0], rot=45, title="Test accuracy", xlabel="")
@@ -0,0 +1,222 @@
+import numpy as np
+import pandas as pd
+import asyncio
+import pickle
+import time
+
+# Outputs of the openAI system prompt and the matching label names of PreprocessAPA
+LLM_LABEL_NAMES = {"0": "NONRELEVANT", "1": "interview", "2": "letter", "3": "comment"}
+
+
+class CascadeClassifier:
+    """
+    Scores every text with the local TF-IDF model and escalates only the uncertain ones to the LLM.
+    A text is uncertain if the margin between the two highest predict_proba values is below threshold.
+    LLM calls go through OpenAI.classify_batch, so they are batched, concurrent, rate limited and cached.
+
+    Example usage:
+
+    label_ids = dict(train[['labels', 'label_ids']].drop_duplicates().values)
+    cascade = CascadeClassifier.from_pickle("./depl_model/classifier.pkl", "./depl_model/vectorizer.pkl",
+                                            OpenAI(api_key, max_concurrency=16, cache_path="./llm_cache.sqlite"),
+                                            llm_label_map=CascadeClassifier.make_label_map(label_ids))
+    report = cascade.tune_threshold(val['text'], val['label_ids'], max_llm_rate=0.2)
+    preds = cascade.predict(test['text'])
+
+    # Inside an event loop, e.g. a FastAPI endpoint. Escalated texts of concurrent calls are
+    # collected for batch_wait seconds (or up to max_batch_size) and sent as one LLM batch
+    result = await cascade.predict_async([text])
+    """
+
+    def __init__(self, classifier, vectorizer, llm_client, threshold=0.2, llm_model="gpt-3.5-turbo-0125",
+                 llm_label_map=None, batch_wait=0.05, max_batch_size=64, **batch_kwargs):
+        """
+        Args:
+            classifier: fitted sklearn classifier with predict_proba (e.g. LogisticRegression)
+            vectorizer: fitted TfidfVectorizer
+            llm_client: openAI.OpenAI instance
+            threshold (float): escalate texts with predict_proba margin below this value
+            llm_model (str): model name passed to the LLM client
+            llm_label_map (dict): required, LLM output -> local label id, outputs mapped to None or missing fall back
+                                  to the local prediction, see make_label_map
+            batch_wait (float): seconds predict_async waits to collect escalated texts into one LLM batch
+            max_batch_size (int): send the collected LLM batch early once it has this many texts
+            batch_kwargs: passed to classify_batch (max_retries, timeout). Concurrency and rate limits
+                          are set on the llm_client and shared by all calls
+        """
+        if llm_label_map is None:
+            # The LLM outputs are not the local label ids, e.g. "1" is interview for the LLM
+            raise ValueError("llm_label_map is required, build it with CascadeClassifier.make_label_map(label_ids)")
+
+        self.classifier = classifier
+        self.vectorizer = vectorizer
+        self.llm_client = llm_client
+        self.threshold = threshold
+        self.llm_model = llm_model
+        self.llm_label_map = llm_label_map
+        self.batch_wait = batch_wait
+        self.max_batch_size = max_batch_size
+        self.batch_kwargs = batch_kwargs
+
+        # Micro-batching state of predict_async, used from one event loop
+        self.pending = []
+        self.flush_handle = None
+        self.batch_tasks = set()
+
+    @staticmethod
+    def make_label_map(label_ids):
+        """
+        Builds llm_label_map from label name -> local label id, e.g.
+        dict(train[['labels', 'label_ids']].drop_duplicates().values). LLM labels without a local class fall back.
+        """
+        return {output: label_ids[name] for output, name in LLM_LABEL_NAMES.items() if name in label_ids}
+
+    @classmethod
+    def from_pickle(cls, classifier_path, vectorizer_path, llm_client, **kwargs):
+        with open(classifier_path, "rb") as file:
+            classifier = pickle.load(file)
+        with open(vectorizer_path, "rb") as file:
+            vectorizer = pickle.load(file)
+        return cls(classifier, vectorizer, llm_client, **kwargs)
+
+    def score_local(self, texts):
+        """
+        Returns: (local predictions, predict_proba margins)
+        """
+        probs = self.classifier.predict_proba(self.vectorizer.transform(texts))
+        top2 = np.sort(probs, axis=1)[:, -2:]
+        margins = top2[:, 1] - top2[:, 0] if probs.shape[1] > 1 else np.ones(len(probs))
+        return self.classifier.classes_[np.argmax(probs, axis=1)], margins
+
+    def _map_llm_label(self, result):
+        if result["status"] != "ok":
+            return None
+        return self.llm_label_map.get(result["label"])
+
+    def _combine(self, local_preds, margins, escalated, llm_results):
+        labels = list(local_preds)
+        sources = ["local"] * len(labels)
+        for i, result in zip(escalated, llm_results):
+            llm_label = self._map_llm_label(result)
+            if llm_label is None:
+                sources[i] = "local_fallback"
+            else:
+                labels[i] = llm_label
+                sources[i] = "llm"
+        return pd.DataFrame({"label": labels, "source": sources, "margin": margins})
+
+    def predict_detailed(self, texts):
+        """
+        Returns: DataFrame with the final label, its source ("local", "llm" or "local_fallback" if the
+        LLM failed or gave an unknown label) and the local margin for every text in input order
+        """
+        texts = [str(text) for text in texts]
+        local_preds, margins = self.score_local(texts)
+        escalated = np.flatnonzero(margins < self.threshold)
+        llm_results = []
+        if len(escalated):
+            llm_results = self.llm_client.classify_batch([texts[i] for i in escalated], model=self.llm_model, **self.batch_kwargs)
+        return self._combine(local_preds, margins, escalated, llm_results)
+
+    async def predict_async(self, texts):
+        """
+        Same as predict_detailed but awaitable, for use inside a running event loop (FastAPI, Jupyter).
+        Escalated texts are queued and sent to the LLM together with those of concurrent calls.
+        """
+        texts = [str(text) for text in texts]
+        local_preds, margins = self.score_local(texts)
+        escalated = np.flatnonzero(margins < self.threshold)
+        llm_results = []
+        if len(escalated):
+            llm_results = await self._escalate([texts[i] for i in escalated])
+        return self._combine(local_preds, margins, escalated, llm_results)
+
+    async def _escalate(self, texts):
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            self.pending.append((text, future))
+            futures.append(future)
+
+        if len(self.pending) >= self.max_batch_size:
+            self._flush()
+        elif self.flush_handle is None:
+            self.flush_handle = loop.call_later(self.batch_wait, self._flush)
+        return await asyncio.gather(*futures)
+
+    def _flush(self):
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        pending, self.pending = self.pending, []
+        if pending:
+            # Keep a reference, the event loop only holds weak references to tasks
+            task = asyncio.ensure_future(self._run_llm_batch(pending))
+            self.batch_tasks.add(task)
+            task.add_done_callback(self.batch_tasks.discard)
+
+    async def _run_llm_batch(self, pending):
+        try:
+            results = await self.llm_client.classify_batch_async([text for text, _ in pending], model=self.llm_model,
+                                                                 **self.batch_kwargs)
+        except Exception as e:
+            results = [{"label": None, "status": "error", "attempts": 0, "error": f"{type(e).__name__}: {e}", "cached": False}
+                       for _ in pending]
+        for (_, future), result in zip(pending, results):
+            if not future.done():
+                future.set_result(result)
+
+    def predict(self, texts):
+        return self.predict_detailed(texts)["label"].values
+
+    def tune_threshold(self, texts, labels, thresholds=None, max_llm_rate=None):
+        """
+        Reports the accuracy / LLM call rate / latency trade-off on a held-out set. Only texts below the
+        largest threshold are sent to the LLM, once. Latency is the measured local time per text plus
+        the LLM call rate times the measured LLM time per escalated text.
+
+        If max_llm_rate is given, <self.threshold> is set to the most accurate threshold within that call rate.
+
+        Returns: DataFrame indexed by threshold
+        """
+        texts, labels = [str(text) for text in texts], np.asarray(labels)
+        if thresholds is None:
+            thresholds = np.round(np.arange(0, 1.01, 0.05), 2)
+
+        start_t = time.perf_counter()
+        local_preds, margins = self.score_local(texts)
+        local_latency = (time.perf_counter() - start_t) / max(len(texts), 1)
+
+        candidates = np.flatnonzero(margins < max(thresholds))
+        llm_labels = {}
+        llm_latency = 0.0
+        if len(candidates):
+            start_t = time.perf_counter()
+            results = self.llm_client.classify_batch([texts[i] for i in candidates], model=self.llm_model, **self.batch_kwargs)
+            llm_latency = (time.perf_counter() - start_t) / len(candidates)
+            llm_labels = {i: self._map_llm_label(result) for i, result in zip(candidates, results)}
+
+        perform_list = []
+        for threshold in thresholds:
+            preds = local_preds.copy()
+            escalated = np.flatnonzero(margins < threshold)
+            for i in escalated:
+                if llm_labels.get(i) is not None:
+                    preds[i] = llm_labels[i]
+            llm_rate = len(escalated) / max(len(texts), 1)
+            perform_list.append(dict([
+                ('Threshold', threshold),
+                ('Accuracy', round(float(np.mean(preds == labels)), 4)),
+                ('LLM Call Rate', round(llm_rate, 4)),
+                ('Latency (ms/doc)', round((local_latency + llm_rate * llm_latency) * 1000, 3))
+                ]))
+        report = pd.DataFrame(data=perform_list).set_index('Threshold')
+
+        if max_llm_rate is not None:
+            allowed = report[report['LLM Call Rate'] <= max_llm_rate]
+            if not allowed.empty:
+                self.threshold = float(allowed['Accuracy'].idxmax())
+                print(f"Threshold set to {self.threshold}")
+
+        return report
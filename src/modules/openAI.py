@@ -1,28 +1,395 @@
 import openai
+import asyncio
+import random
+import time
+import hashlib
+import json
+import sqlite3
+import threading
+
+SYSTEM_PROMPT = "You will be given a German text sample. Classify it into one of four categories: Interview, Letter to Editor, Opinion, or Other. Output only the label: 1 for Interview, 2 for Letter to Editor, 3 for Opinion, and 0 for Other. Use the following classification criteria: 1. Interview: Structure: dialog format, question-answer pairs, uses names and titles to indicate speakers, can vary in length but typically provides substantial responses. Language: lot of question marks, first- and third-person pronouns; questions are often followed by colons or quotation marks; uses names and titles to indicate speakers . Content: intro of interviewee, topic-focused Q&A: interviewee’s expertise, experiences, or opinions. 2. Letter to Editor: Structure: Heading, starts with a salutation or direct address; often labeled 'Leserbrief' or 'Leserpost'; generally short and concise, one or few paragraphs. Language: formal, persuasive; exclamation marks, rhetorical questions; strongly opinionated language. Content: personal opinions or reactions to specific articles/events/societal issues. 3. Opinion: Structure: essay-like with intro, body, conclusion; often begins with a clear statement or provocative question; multiple paragraphs, may include subheadings. Language: persuasive, formal, emotive; first-person pronouns. Content: analysis of current events, societal issues, political matters, or cultural topics; and arguments supported by evidence, examples, references. 0. Other: Structure: varied vormats, including news, events, announcements, and practical advice; diverse formatting with headings, bullet points, lists. Language: neutral or factual language for news; persuasive for advertisements. Content: wide-range, event-driven. Instruction: Given a text sample, classify it based on the criteria above. Output only the corresponding label: 1 for Interview, 2 for Letter to Editor, 3 for Opinion, and 0 for Other."
+
+# Errors worth retrying with backoff
+TRANSIENT_ERRORS = (openai.error.RateLimitError, openai.error.APIError, openai.error.Timeout,
+                    openai.error.ServiceUnavailableError, openai.error.APIConnectionError, asyncio.TimeoutError)
+
+
+class ResponseCache:
+    """
+    Durable SQLite cache of classifications keyed by model name, system prompt hash and text hash.
+    Stores the raw response next to the parsed label. WAL mode allows concurrent readers and writers,
+    also from several processes. Entries older than max_age_days are evicted, and above max_entries
+    the least recently used ones, checked every evict_every written entries. Lookups only read; their
+    access times are collected in memory and written best-effort with the next write or every flush_every lookups.
+    """
+    
+    def __init__(self, path, max_entries=None, max_age_days=None, flush_every=1000, evict_every=100):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.flush_every = flush_every
+        self.evict_every = evict_every
+        self.writes_since_evict = 0
+        self.local = threading.local()
+        self.pending_access = {}
+        self.pending_lock = threading.Lock()
+        
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""CREATE TABLE IF NOT EXISTS responses (
+                            key TEXT PRIMARY KEY,
+                            model TEXT,
+                            label TEXT,
+                            raw TEXT,
+                            created REAL,
+                            accessed REAL)""")
+        conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        conn.execute("CREATE INDEX IF NOT EXISTS responses_created ON responses (created)")
+        conn.commit()
+    
+    def _connect(self):
+        # sqlite3 connections must not be shared between threads
+        if getattr(self.local, "conn", None) is None:
+            self.local.conn = sqlite3.connect(self.path, timeout=30)
+        return self.local.conn
+    
+    @staticmethod
+    def make_key(model, text, system_prompt=SYSTEM_PROMPT):
+        prompt_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+        text_hash = hashlib.sha256(str(text).encode("utf-8")).hexdigest()
+        return hashlib.sha256(f"{model}:{prompt_hash}:{text_hash}".encode("utf-8")).hexdigest()
+    
+    def get(self, model, text):
+        return self.get_many(model, [text])[0]
+    
+    def get_many(self, model, texts):
+        """
+        Bulk lookup, e.g. for a whole DataFrame column.
+        
+        Returns: list of dicts with "label" and "raw" in input order, None for texts not cached
+        """
+        keys = [self.make_key(model, text) for text in texts]
+        found = {}
+        conn = self._connect()
+        unique_keys = list(set(keys))
+        # Stay below the SQLite limit of host parameters
+        for start in range(0, len(unique_keys), 500):
+            chunk = unique_keys[start:start + 500]
+            rows = conn.execute(f"SELECT key, label, raw FROM responses WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+            for key, label, raw in rows:
+                found[key] = {"label": label, "raw": raw}
+        if found:
+            now = time.time()
+            with self.pending_lock:
+                self.pending_access.update((key, now) for key in found)
+                n_pending = len(self.pending_access)
+            if n_pending >= self.flush_every:
+                self.flush_access()
+        return [found.get(key) for key in keys]
+    
+    def _take_pending(self):
+        with self.pending_lock:
+            pending, self.pending_access = self.pending_access, {}
+        return pending
+    
+    def _restore_pending(self, pending):
+        with self.pending_lock:
+            for key, accessed in pending.items():
+                self.pending_access[key] = max(accessed, self.pending_access.get(key, 0))
+    
+    def flush_access(self):
+        """
+        Writes the collected access times. Best-effort: if the database is busy they are kept for the next write.
+        """
+        pending = self._take_pending()
+        if not pending:
+            return
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA busy_timeout = 100")
+            conn.executemany("UPDATE responses SET accessed = MAX(accessed, ?) WHERE key = ?",
+                             [(accessed, key) for key, accessed in pending.items()])
+            conn.commit()
+        except sqlite3.OperationalError:
+            conn.rollback()
+            self._restore_pending(pending)
+        finally:
+            conn.execute("PRAGMA busy_timeout = 30000")
+    
+    def put(self, model, text, label, raw):
+        self.put_many(model, [(text, label, raw)])
+    
+    def put_many(self, model, items):
+        """
+        Stores (text, label, raw) tuples in one transaction, evicts once evict_every entries were written.
+        """
+        now = time.time()
+        pending = self._take_pending()
+        conn = self._connect()
+        try:
+            conn.executemany("INSERT OR REPLACE INTO responses (key, model, label, raw, created, accessed) VALUES (?, ?, ?, ?, ?, ?)",
+                             [(self.make_key(model, text), model, label, raw, now, now) for text, label, raw in items])
+            # Access times of earlier lookups go with this write, so eviction sees them
+            conn.executemany("UPDATE responses SET accessed = MAX(accessed, ?) WHERE key = ?",
+                             [(accessed, key) for key, accessed in pending.items()])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            self._restore_pending(pending)
+            raise
+        
+        with self.pending_lock:
+            self.writes_since_evict += len(items)
+            run_evict = self.writes_since_evict >= self.evict_every
+            if run_evict:
+                self.writes_since_evict = 0
+        if run_evict:
+            self.evict()
+    
+    def evict(self):
+        conn = self._connect()
+        if self.max_age_days is not None:
+            conn.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.max_age_days * 86400, ))
+        if self.max_entries is not None:
+            conn.execute("""DELETE FROM responses WHERE key IN (
+                                SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)""", (self.max_entries, ))
+        conn.commit()
+    
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+class RateLimiter:
+    """
+    Token buckets for requests and tokens per minute, shared by all concurrent requests.
+    """
+    
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.capacity = {"requests": requests_per_minute, "tokens": tokens_per_minute}
+        self.available = dict(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+        
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self.updated
+        self.updated = now
+        for key, capacity in self.capacity.items():
+            self.available[key] = min(capacity, self.available[key] + elapsed * capacity / 60)
+    
+    async def acquire(self, tokens):
+        # A single request larger than the bucket would wait forever
+        tokens = min(tokens, self.capacity["tokens"])
+        async with self.lock:
+            while True:
+                self._refill()
+                if self.available["requests"] >= 1 and self.available["tokens"] >= tokens:
+                    self.available["requests"] -= 1
+                    self.available["tokens"] -= tokens
+                    return
+                wait = max((1 - self.available["requests"]) * 60 / self.capacity["requests"],
+                           (tokens - self.available["tokens"]) * 60 / self.capacity["tokens"])
+                await asyncio.sleep(wait)
+
 
 class OpenAI:
-    def __init__(self, api_key):
+    def __init__(self, api_key, api_base=None, max_concurrency=8, requests_per_minute=500, tokens_per_minute=200000,
+                 cache_path=None, cache_max_entries=None, cache_max_age_days=None):
         """
         Initializes the TextClassifier with the provided OpenAI API key.
+        api_base can point to another chat-completions compatible endpoint, e.g. a local stub server.
+        max_concurrency, requests_per_minute and tokens_per_minute are shared by all batch calls on this instance.
+        If cache_path is given, classifications are cached in that SQLite file (see ResponseCache),
+        so reruns on the same texts make no API calls.
         """
         openai.api_key = api_key
+        self.api_key = api_key
+        self.api_base = api_base or openai.api_base
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        
+        # All batch calls run on one background event loop, so they share the semaphore and rate limiter
+        self.loop = None
+        self.loop_lock = threading.Lock()
+        self.semaphore = None
+        self.limiter = None
+        self.cache = None
+        if cache_path is not None:
+            self.cache = ResponseCache(cache_path, max_entries=cache_max_entries, max_age_days=cache_max_age_days)
     
     def classify_openai(self, text, model="gpt-3.5-turbo-0125"):
         """
         Classifies the given text using the specified model.
         """
+        if self.cache is not None:
+            cached = self.cache.get(model, text)
+            if cached is not None:
+                return cached["label"]
+        
         response = openai.ChatCompletion.create(
             model=model,
             messages=[
-                {"role": "system", "content": "You will be given a German text sample. Classify it into one of four categories: Interview, Letter to Editor, Opinion, or Other. Output only the label: 1 for Interview, 2 for Letter to Editor, 3 for Opinion, and 0 for Other. Use the following classification criteria: 1. Interview: Structure: dialog format, question-answer pairs, uses names and titles to indicate speakers, can vary in length but typically provides substantial responses. Language: lot of question marks, first- and third-person pronouns; questions are often followed by colons or quotation marks; uses names and titles to indicate speakers . Content: intro of interviewee, topic-focused Q&A: interviewee’s expertise, experiences, or opinions. 2. Letter to Editor: Structure: Heading, starts with a salutation or direct address; often labeled 'Leserbrief' or 'Leserpost'; generally short and concise, one or few paragraphs. Language: formal, persuasive; exclamation marks, rhetorical questions; strongly opinionated language. Content: personal opinions or reactions to specific articles/events/societal issues. 3. Opinion: Structure: essay-like with intro, body, conclusion; often begins with a clear statement or provocative question; multiple paragraphs, may include subheadings. Language: persuasive, formal, emotive; first-person pronouns. Content: analysis of current events, societal issues, political matters, or cultural topics; and arguments supported by evidence, examples, references. 0. Other: Structure: varied vormats, including news, events, announcements, and practical advice; diverse formatting with headings, bullet points, lists. Language: neutral or factual language for news; persuasive for advertisements. Content: wide-range, event-driven. Instruction: Given a text sample, classify it based on the criteria above. Output only the corresponding label: 1 for Interview, 2 for Letter to Editor, 3 for Opinion, and 0 for Other."},
+                {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": text}
-            ]
+            ],
+            api_base=self.api_base
         )
         category = response.choices[0].message['content'].strip()
+        
+        if self.cache is not None:
+            self.cache.put(model, text, category, json.dumps(response))
         return category
+    
+    def prefetch(self, texts, model="gpt-3.5-turbo-0125"):
+        """
+        Returns: list of cached labels for texts in input order, None where not cached
+        """
+        if self.cache is None:
+            return [None] * len(texts)
+        return [hit["label"] if hit is not None else None for hit in self.cache.get_many(model, list(texts))]
 
     def classify_openai_gpt4o(self, text):
         """
         Classifies the given text using the GPT-4 model.
         """
         return self.classify_openai(text, model="gpt-4o")
+    
+    def _get_loop(self):
+        with self.loop_lock:
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                threading.Thread(target=self.loop.run_forever, daemon=True).start()
+                asyncio.run_coroutine_threadsafe(self._make_limits(), self.loop).result()
+        return self.loop
+    
+    async def _make_limits(self):
+        # Created on the background loop, asyncio primitives are bound to the loop they are used on
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.limiter = RateLimiter(self.requests_per_minute, self.tokens_per_minute)
+    
+    def set_limits(self, max_concurrency=None, requests_per_minute=None, tokens_per_minute=None):
+        """
+        Changes the shared limits. Batches already running keep the old ones.
+        """
+        if max_concurrency is not None:
+            self.max_concurrency = max_concurrency
+        if requests_per_minute is not None:
+            self.requests_per_minute = requests_per_minute
+        if tokens_per_minute is not None:
+            self.tokens_per_minute = tokens_per_minute
+        asyncio.run_coroutine_threadsafe(self._make_limits(), self._get_loop()).result()
+    
+    async def _classify_one(self, text, model, semaphore, limiter, max_retries, timeout):
+        # Returns (result, raw response as JSON or None)
+        result = {"label": None, "status": "error", "attempts": 0, "error": None, "cached": False}
+        # Rough token estimate: 4 characters per token plus the one token answer
+        tokens = (len(SYSTEM_PROMPT) + len(text)) // 4 + 1
+        
+        async with semaphore:
+            for attempt in range(max_retries + 1):
+                result["attempts"] = attempt + 1
+                await limiter.acquire(tokens)
+                try:
+                    response = await asyncio.wait_for(openai.ChatCompletion.acreate(
+                        model=model,
+                        messages=[
+                            {"role": "system", "content": SYSTEM_PROMPT},
+                            {"role": "user", "content": text}
+                        ],
+                        api_key=self.api_key,
+                        api_base=self.api_base
+                    ), timeout=timeout)
+                    result["label"] = response.choices[0].message['content'].strip()
+                    result["status"] = "ok"
+                    result["error"] = None
+                    return result, json.dumps(response)
+                except TRANSIENT_ERRORS as e:
+                    result["error"] = f"{type(e).__name__}: {e}"
+                    if attempt < max_retries:
+                        # Exponential backoff with full jitter, capped at 60 seconds
+                        await asyncio.sleep(random.uniform(0, min(60, 2 ** attempt)))
+                except Exception as e:
+                    result["error"] = f"{type(e).__name__}: {e}"
+                    return result, None
+        return result, None
+    
+    async def _classify_batch(self, texts, model, max_retries, timeout, use_cache=True):
+        texts = [str(text) for text in texts]
+        results = [None] * len(texts)
+        cache = self.cache if use_cache else None
+        
+        # Only texts missing from the cache are sent to the API
+        if cache is not None:
+            hits = await asyncio.to_thread(cache.get_many, model, texts)
+            for i, hit in enumerate(hits):
+                if hit is not None:
+                    results[i] = {"label": hit["label"], "status": "ok", "attempts": 0, "error": None, "cached": True}
+        
+        missing = [i for i, result in enumerate(results) if result is None]
+        tasks = [self._classify_one(texts[i], model, self.semaphore, self.limiter, max_retries, timeout) for i in missing]
+        to_cache = []
+        for i, (result, raw) in zip(missing, await asyncio.gather(*tasks)):
+            results[i] = result
+            if raw is not None:
+                to_cache.append((texts[i], result["label"], raw))
+        
+        if cache is not None and to_cache:
+            # One write per batch, off the event loop. A failed cache write keeps the results
+            try:
+                await asyncio.to_thread(cache.put_many, model, to_cache)
+            except sqlite3.Error:
+                pass
+        return results
+    
+    async def classify_batch_async(self, texts, model="gpt-3.5-turbo-0125", max_retries=5, timeout=60, use_cache=True):
+        """
+        Classifies texts concurrently. Use with await in a running event loop (e.g. Jupyter, FastAPI),
+        otherwise use classify_batch. Concurrent calls share the limits of this instance.
+        use_cache=False bypasses the response cache for reads and writes.
+        
+        Returns: list of dicts with "label", "status" ("ok" or "error"), "attempts", "error" and "cached" in input order
+        """
+        future = asyncio.run_coroutine_threadsafe(self._classify_batch(list(texts), model, max_retries, timeout, use_cache),
+                                                  self._get_loop())
+        return await asyncio.wrap_future(future)
+    
+    def classify_batch(self, texts, model="gpt-3.5-turbo-0125", max_retries=5, timeout=60, use_cache=True):
+        """
+        Blocking version of classify_batch_async, also callable inside Jupyter.
+        
+        Example usage:
+        
+        classifier = OpenAI(api_key, max_concurrency=16)
+        results = pd.DataFrame(classifier.classify_batch(df['text']))
+        df['predicted'] = results['label'].values
+        """
+        future = asyncio.run_coroutine_threadsafe(self._classify_batch(list(texts), model, max_retries, timeout, use_cache),
+                                                  self._get_loop())
+        return future.result()
+    
+    def benchmark_concurrency(self, texts, levels=(1, 2, 4, 8, 16), **kwargs):
+        """
+        Runs classify_batch on texts for every concurrency level. The response cache is bypassed,
+        so every level measures the API and not SQLite.
+        
+        Returns: DataFrame with docs/s, errors and mean attempts per concurrency level
+        """
+        import pandas as pd
+        
+        texts = list(texts)
+        perform_list = []
+        max_concurrency = self.max_concurrency
+        for level in levels:
+            self.set_limits(max_concurrency=level)
+            start_t = time.perf_counter()
+            results = self.classify_batch(texts, use_cache=False, **kwargs)
+            runtime = time.perf_counter() - start_t
+            perform_list.append(dict([
+                ('Concurrency', level),
+                ('Docs/s', round(len(texts) / runtime, 2)),
+                ('Errors', sum(r["status"] != "ok" for r in results)),
+                ('Mean Attempts', round(sum(r["attempts"] for r in results) / max(len(results), 1), 2))
+                ]))
+        self.set_limits(max_concurrency=max_concurrency)
+        return pd.DataFrame(data=perform_list).set_index('Concurrency')
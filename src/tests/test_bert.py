@@ -0,0 +1,20 @@
+import pandas as pd
+import sys
+from sklearn.metrics import classification_report
+
+sys.path.append("/Users/ibragimzhussup/Desktop/APA_Lab/src/modules")
+
+from BERT_inference import BertInference
+
+label_mapping = {"NONRELEVANT": 0, "letter": 1, 'interview': 2, 'comment': 3}
+df = pd.read_csv("/Users/ibragimzhussup/Desktop/APA_Lab/src/data/full_text.csv")
+df['label'] = df['labels'].map(label_mapping)
+val_df = df.sample(1000, random_state=42)
+
+engine = BertInference("./apa-model", "./apa-tokenizer", num_threads=8)
+print(classification_report(val_df['label'], engine.predict(val_df['text'])))
+print(engine.benchmark(val_df['text'].iloc[:200], batch_size=32))
+
+engine_int8 = BertInference("./apa-model", "./apa-tokenizer", num_threads=8, quantize=True)
+print(classification_report(val_df['label'], engine_int8.predict(val_df['text'])))
+print(engine_int8.benchmark(val_df['text'].iloc[:200], batch_size=32))
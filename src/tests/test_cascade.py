@@ -0,0 +1,31 @@
+import os
+import sys
+import pandas as pd
+
+sys.path.append("/Users/ibragimzhussup/Desktop/APA_Lab/src/modules")
+
+from preprocess import PreprocessAPA
+from openAI import OpenAI
+from cascade import CascadeClassifier
+
+prep_ml = pd.read_csv("/Users/ibragimzhussup/Desktop/APA_Lab/src/data/preprocessed_text.csv")
+preproc = PreprocessAPA()
+train, test, val = preproc.split_data(prep_ml, test_val=True, n_samples_train=500, test_split_ratio=0.5)
+print(train[['labels', 'label_ids']].drop_duplicates().sort_values(by='label_ids'))
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+vectorizer = TfidfVectorizer()
+clf = LogisticRegression().fit(vectorizer.fit_transform(train['text']), train['label_ids'])
+
+# Map the LLM labels (1 Interview, 2 Letter, 3 Opinion, 0 Other) to the factorized label_ids printed above
+llm_label_map = CascadeClassifier.make_label_map(dict(train[['labels', 'label_ids']].drop_duplicates().values))
+print(llm_label_map)
+llm = OpenAI(os.environ["OPENAI_API_KEY"], max_concurrency=16, cache_path="./llm_cache.sqlite")
+cascade = CascadeClassifier(clf, vectorizer, llm, llm_label_map=llm_label_map)
+
+print(cascade.tune_threshold(val['text'].iloc[:300], val['label_ids'].iloc[:300], max_llm_rate=0.2))
+result = cascade.predict_detailed(test['text'].iloc[:300])
+print(result['source'].value_counts())
+print((result['label'].values == test['label_ids'].iloc[:300].values).mean())
@@ -13,7 +13,7 @@ preproc = PreprocessAPA()
 train, test, val = preproc.split_data(full_ml, test_val=True, n_samples_train=500, test_split_ratio=0.5)
 print(train[['labels', 'label_ids']].drop_duplicates().sort_values(by='label_ids'))
 
-from DL_models import RNN, CNN 
+from DL_models import RNN, CNN, SharedTokenizer
 
 
 lstm = RNN()
@@ -29,3 +29,41 @@ model_cnn, _ = cnn.build_model(use_basic_embed=True, optimizer="adam")
 print(model_cnn.summary())
 
 
+
+lstm_bucketed = RNN()
+lstm_bucketed.tokenize(train,test,val)
+print(lstm_bucketed.compare_pipelines(batch_size=32, epochs=1, optimizer="adam"))
+
+cnn_bucketed = CNN()
+cnn_bucketed.tokenize(train,test,val)
+print(cnn_bucketed.compare_pipelines(batch_size=32, epochs=1, optimizer="adam"))
+
+# Second tokenize call loads the cached vocabulary and sequences instead of re-tokenizing
+lstm_cached = RNN()
+lstm_cached.tokenize(train,test,val, cache_dir="./cache/tokenizer")
+cnn_cached = CNN()
+cnn_cached.tokenize(train,test,val, cache_dir="./cache/tokenizer")
+shared = SharedTokenizer.load("./cache/tokenizer")
+print(shared.texts_to_sequences(test['text'].iloc[:2]))
+
+# Frozen hub embedding: embed once, then train the head on the cached vectors
+import tensorflow as tf
+import tensorflow_hub as hub
+hub_layer_de_128 = hub.KerasLayer("https://www.kaggle.com/models/google/nnlm/frameworks/TensorFlow2/variations/de-dim128/versions/1",
+                            dtype=tf.string, trainable=False, input_shape=[])
+lstm_hub = RNN()
+lstm_hub.embedding = hub_layer_de_128
+lstm_hub.tokenize(train,test,val)
+_, _, _, y_train, y_test, y_val = lstm_hub.pad_and_label_preproc()
+X_train_embed = lstm_hub.embed_cached(train['text'], "./cache/nnlm_de_128")
+X_val_embed = lstm_hub.embed_cached(val['text'], "./cache/nnlm_de_128")
+model_lstm_hub, early_stop = lstm_hub.build_model(use_basic_embed=False, reshape=128, precomputed_embed=True)
+model_lstm_hub.fit(X_train_embed, y_train, batch_size=64, epochs=5, callbacks=[early_stop], validation_data=(X_val_embed, y_val))
+
+# TFLite export of the basic embedding LSTM
+from DL_export import TFLitePredictor, compare_export
+model_lstm.fit(X_train, y_train, batch_size=64, epochs=3, validation_data=(X_val, y_val))
+print(compare_export(model_lstm, lstm.tokenizer, lstm.max_len, test['text'], test['label_ids'], "./export/lstm"))
+lstm.export(model_lstm, "./export/lstm_int8", quantization="int8")
+predictor = TFLitePredictor("./export/lstm_int8")
+print(predictor.predict(test['text'].iloc[:10]))
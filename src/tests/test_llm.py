@@ -0,0 +1,77 @@
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+sys.path.append("../modules")
+
+from openAI import OpenAI
+
+
+class StubChatCompletions(BaseHTTPRequestHandler):
+    """
+    Imitates the chat-completions endpoint: answers with a random label after a fixed latency
+    and fails a share of the requests with 429 or 500 to exercise the retries.
+    """
+
+    latency = 0.2
+    error_rate = 0.1
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        time.sleep(self.latency)
+
+        if random.random() < self.error_rate:
+            status = random.choice([429, 500])
+            payload = {"error": {"message": "stub error", "type": "server_error", "param": None, "code": None}}
+        else:
+            status = 200
+            payload = {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body["model"],
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": str(random.randint(0, 3))}}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 1, "total_tokens": 1}
+            }
+
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+server = ThreadingHTTPServer(("127.0.0.1", 0), StubChatCompletions)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+api_base = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+classifier = OpenAI(api_key="stub-key", api_base=api_base, max_concurrency=16)
+texts = [f"Beispieltext Nummer {i}" for i in range(200)]
+
+results = pd.DataFrame(classifier.classify_batch(texts, max_retries=5))
+print(results.head())
+print(results['status'].value_counts())
+assert len(results) == len(texts)
+
+print(classifier.benchmark_concurrency(texts, levels=(1, 4, 16, 32)))
+
+# Rerun with the SQLite cache: the second run makes no API calls
+cached_classifier = OpenAI(api_key="stub-key", api_base=api_base, max_concurrency=16,
+                           cache_path="./llm_cache.sqlite", cache_max_age_days=30)
+first = pd.DataFrame(cached_classifier.classify_batch(texts))
+second = pd.DataFrame(cached_classifier.classify_batch(texts))
+print(f"Cached on rerun: {second['cached'].sum()} / {len(texts)}")
+assert second.loc[first['status'] == 'ok', 'cached'].all()
+print(cached_classifier.prefetch(texts[:5]))
+
+server.shutdown()
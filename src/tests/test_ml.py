@@ -25,6 +25,10 @@ plt.show()
 ml_modeling.plot_performance(preprocessed_df_performance, average_val = "macro")
 plt.show()
 
+print(preprocessed_df_performance[['Test Accuracy', 'Fit Time (s)', 'Latency Single (ms/doc)', 'Latency Batch (ms/doc)', 'Model Size (KB)']])
+ml_modeling.plot_performance(preprocessed_df_performance, average_val = "weighted", pareto=True)
+plt.show()
+
 lr_bestparams = ml_modeling.fine_tune("logreg", use_all_CPUs=True, number_of_iterations=50, num_cv=5)
 svc_bestparams = ml_modeling.fine_tune("svc", use_all_CPUs=True, number_of_iterations=10, num_cv=5)
 